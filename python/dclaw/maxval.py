@@ -6,6 +6,12 @@ import fiona
 import numpy as np
 import rasterio
 import rasterio.transform
+import rasterio.windows
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = prange = None
 from dclaw.fortconvert import convertfortdir
 from dclaw.get_data import get_dig_data, get_region_data
 from rasterio import features
@@ -182,30 +188,32 @@ def main():
         os.mkdir(os.path.join(args.wdir, args.gdir))
 
     # check which files to convert. Could do a temporal filter here..
-    files = glob.glob(os.path.join(args.wdir, *[args.odir, "fort.q*"]))
-    ntifs = glob.glob(os.path.join(args.wdir, *[args.gdir, "fort_q*.tif"]))
+    # one scandir of each directory caches every mtime up front, instead
+    # of a glob plus exists/getmtime round trips per fort file.
+    fort_mtimes = {}
+    fortdir = os.path.join(args.wdir, args.odir)
+    if os.path.isdir(fortdir):
+        with os.scandir(fortdir) as it:
+            for entry in it:
+                if entry.name.startswith("fort.q"):
+                    fort_mtimes[entry.name] = entry.stat().st_mtime
+
+    tif_mtimes = {}
+    with os.scandir(os.path.join(args.wdir, args.gdir)) as it:
+        for entry in it:
+            if entry.name.startswith("fort_q") and entry.name.endswith(".tif"):
+                tif_mtimes[entry.name] = entry.stat().st_mtime
 
     nfiles = []
-
-    # print(args.check_done)
-    for file in files:
-        numstr = os.path.basename(file)[6:]
-        tifname = os.path.join(
-            ".",
-            *[os.path.join(args.wdir, args.gdir), "fort_q{}.tif".format(numstr)]
-        )
-        if os.path.exists(tifname) and args.check_done:
-            mtime_fort = os.path.getmtime(file)
-            mtime_tif = os.path.getmtime(tifname)
-            if mtime_tif > mtime_fort:
-                process = False
-            else:
-                process = True
-        else:
-            process = True
-        if process:
-            nfiles.append(int(numstr))
-    nfiles = np.sort(nfiles)
+    for name, mtime_fort in fort_mtimes.items():
+        numstr = name[6:]
+        mtime_tif = tif_mtimes.get("fort_q{}.tif".format(numstr))
+        if args.check_done and mtime_tif is not None and mtime_tif > mtime_fort:
+            continue
+        nfiles.append(int(numstr))
+    # already ints; a plain in-place sort beats round-tripping the list
+    # through a numpy array.
+    nfiles.sort()
 
     if len(nfiles) == 0:
         print("check_done = True and no new files to process. No files reprocessed.")
@@ -249,6 +257,455 @@ def main():
     )
 
 
+def _overwrite_mask(level, lev_tracker, q, q_tracker, compare, scratch_a, scratch_b, out):
+    """Fill out with ``((level >= lev_tracker) & compare(q, q_tracker)) |
+    (level > lev_tracker)`` without allocating temporaries."""
+    np.greater_equal(level, lev_tracker, out=scratch_a)
+    compare(q, q_tracker, out=scratch_b)
+    np.logical_and(scratch_a, scratch_b, out=scratch_a)
+    np.greater(level, lev_tracker, out=scratch_b)
+    np.logical_or(scratch_a, scratch_b, out=out)
+    return out
+
+
+def _update_maxes_numpy(
+    h,
+    hu,
+    hv,
+    hm,
+    eta,
+    level,
+    dx,
+    time,
+    rho_f,
+    rho_s,
+    h_max,
+    h_min,
+    m_max,
+    vel_max,
+    mom_max,
+    eta_max,
+    froude_max,
+    lev_max,
+    h_max_lev,
+    h_min_lev,
+    m_max_lev,
+    vel_max_lev,
+    mom_max_lev,
+    eta_max_lev,
+    froude_max_lev,
+    arrival_time,
+    eta_max_time,
+    vel_max_time,
+    maxlevel,
+):
+    """Vectorized fallback for _update_maxes used when numba is not
+    installed. Reuses two scratch bool arrays across all seven overwrite
+    masks instead of allocating ~5 temporaries per mask expression."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # one reciprocal of h serves m, vel, and froude; division is the
+        # most expensive of the elementwise passes here.
+        hinv = 1.0 / h
+        m = hm * hinv
+        m[np.isnan(m)] = 0
+        vel = np.hypot(hu, hv) * hinv
+        vel[np.isnan(vel)] = 0
+
+        froude = vel * np.sqrt(hinv / 9.81)
+        froude[np.isnan(froude)] = 0
+
+    density = (1.0 - m) * rho_f + (m * rho_s)
+    mom = (h * dx * dx) * density * vel
+
+    scratch_a = np.empty(h.shape, dtype=bool)
+    scratch_b = np.empty(h.shape, dtype=bool)
+
+    # keep track of max level anywhere.
+    np.maximum(lev_max, level, out=lev_max)
+
+    # determine whether to overwrite.
+    overwrite_eta = _overwrite_mask(
+        level, eta_max_lev, eta, eta_max, np.greater, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+    overwrite_h_max = _overwrite_mask(
+        level, h_max_lev, h, h_max, np.greater, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+    overwrite_h_min = _overwrite_mask(
+        level, h_min_lev, h, h_min, np.less, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+    overwrite_m = _overwrite_mask(
+        level, m_max_lev, m, m_max, np.greater, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+    overwrite_vel = _overwrite_mask(
+        level, vel_max_lev, vel, vel_max, np.greater, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+    overwrite_mom = _overwrite_mask(
+        level, mom_max_lev, mom, mom_max, np.greater, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+    overwrite_froude = _overwrite_mask(
+        level, froude_max_lev, froude, froude_max, np.greater, scratch_a, scratch_b,
+        np.empty(h.shape, dtype=bool),
+    )
+
+    # update max level seen. copyto is a dense masked move, avoiding the
+    # gather/scatter of fancy indexing.
+    np.copyto(eta_max_lev, level, where=overwrite_eta)
+    np.copyto(h_max_lev, level, where=overwrite_h_max)
+    np.copyto(h_min_lev, level, where=overwrite_h_min)
+    np.copyto(m_max_lev, level, where=overwrite_m)
+    np.copyto(vel_max_lev, level, where=overwrite_vel)
+    np.copyto(mom_max_lev, level, where=overwrite_mom)
+    np.copyto(froude_max_lev, level, where=overwrite_froude)
+
+    # set arrival time to the first timestep that has eta>0.01 and highest
+    # level. Also set the other times, to indicate the wave has arrived
+    # there and thus its valid to set a max.
+    np.greater(eta, 0.01, out=scratch_a)
+    np.isnan(arrival_time, out=scratch_b)
+    np.logical_and(scratch_a, scratch_b, out=scratch_a)
+    np.equal(level, maxlevel, out=scratch_b)
+    overwrite_arrival = np.logical_and(scratch_a, scratch_b, out=scratch_a)
+
+    np.copyto(arrival_time, time, where=overwrite_arrival)
+    np.copyto(eta_max_time, time, where=overwrite_arrival)
+    np.copyto(vel_max_time, time, where=overwrite_arrival)
+
+    # update max values.
+    np.copyto(h_max, h, where=overwrite_h_max)
+    np.copyto(h_min, h, where=overwrite_h_min)
+    np.copyto(m_max, m, where=overwrite_m)
+    np.copyto(vel_max, vel, where=overwrite_vel)
+    np.copyto(mom_max, mom, where=overwrite_mom)
+    np.copyto(eta_max, eta, where=overwrite_eta)
+    np.copyto(froude_max, froude, where=overwrite_froude)
+
+    # we want the first peak, so only update times within a minute of the
+    # current eta max time (presuming the arrival time has passed).
+    np.less(time - eta_max_time, 1 * 60, out=scratch_a)
+    np.greater_equal(arrival_time, 0, out=scratch_b)
+    not_super_late = np.logical_and(scratch_a, scratch_b, out=scratch_a)
+
+    overwrite_eta_time = np.logical_and(overwrite_eta, not_super_late, out=scratch_b)
+    np.copyto(eta_max_time, time, where=overwrite_eta_time)
+    overwrite_vel_time = np.logical_and(overwrite_vel, not_super_late, out=scratch_b)
+    np.copyto(vel_max_time, time, where=overwrite_vel_time)
+
+
+def _update_maxes_numba(
+    h,
+    hu,
+    hv,
+    hm,
+    eta,
+    level,
+    dx,
+    time,
+    rho_f,
+    rho_s,
+    h_max,
+    h_min,
+    m_max,
+    vel_max,
+    mom_max,
+    eta_max,
+    froude_max,
+    lev_max,
+    h_max_lev,
+    h_min_lev,
+    m_max_lev,
+    vel_max_lev,
+    mom_max_lev,
+    eta_max_lev,
+    froude_max_lev,
+    arrival_time,
+    eta_max_time,
+    vel_max_time,
+    maxlevel,
+):
+    """Fused single-pass update of all max/min/level trackers for one frame.
+
+    Walks the grid once and applies the same "overwrite if at least as
+    refined and more extreme, or more refined" rule to each tracked
+    quantity, so a frame costs one traversal of the nine-band raster
+    instead of one full-array pass per temporary.
+    """
+    for i in prange(h.shape[0]):
+        for j in range(h.shape[1]):
+            hi = h[i, j]
+            if hi > 0.0:
+                hinv = 1.0 / hi
+                m = hm[i, j] * hinv
+                vel = np.hypot(hu[i, j], hv[i, j]) * hinv
+                froude = vel * np.sqrt(hinv / 9.81)
+            else:
+                m = 0.0
+                vel = 0.0
+                froude = 0.0
+            density = (1.0 - m) * rho_f + (m * rho_s)
+            mom = (hi * dx * dx) * density * vel
+
+            lv = level[i, j]
+            etai = eta[i, j]
+
+            # keep track of max level anywhere.
+            if lv > lev_max[i, j]:
+                lev_max[i, j] = lv
+
+            # set arrival time to the first timestep that has eta>0.01 and
+            # highest level. Also set the other times, to indicate the wave
+            # has arrived there and thus its valid to set a max.
+            if etai > 0.01 and np.isnan(arrival_time[i, j]) and lv == maxlevel:
+                arrival_time[i, j] = time
+                eta_max_time[i, j] = time
+                vel_max_time[i, j] = time
+
+            # we want the first peak, so only update times within a minute of
+            # the current eta max time (presuming the arrival time has passed).
+            not_super_late = (time - eta_max_time[i, j]) < 1 * 60 and arrival_time[
+                i, j
+            ] >= 0
+
+            if (lv >= eta_max_lev[i, j] and etai > eta_max[i, j]) or lv > eta_max_lev[
+                i, j
+            ]:
+                eta_max_lev[i, j] = lv
+                eta_max[i, j] = etai
+                if not_super_late:
+                    eta_max_time[i, j] = time
+            if (lv >= h_max_lev[i, j] and hi > h_max[i, j]) or lv > h_max_lev[i, j]:
+                h_max_lev[i, j] = lv
+                h_max[i, j] = hi
+            if (lv >= h_min_lev[i, j] and hi < h_min[i, j]) or lv > h_min_lev[i, j]:
+                h_min_lev[i, j] = lv
+                h_min[i, j] = hi
+            if (lv >= m_max_lev[i, j] and m > m_max[i, j]) or lv > m_max_lev[i, j]:
+                m_max_lev[i, j] = lv
+                m_max[i, j] = m
+            if (lv >= vel_max_lev[i, j] and vel > vel_max[i, j]) or lv > vel_max_lev[
+                i, j
+            ]:
+                vel_max_lev[i, j] = lv
+                vel_max[i, j] = vel
+                if not_super_late:
+                    vel_max_time[i, j] = time
+            if (lv >= mom_max_lev[i, j] and mom > mom_max[i, j]) or lv > mom_max_lev[
+                i, j
+            ]:
+                mom_max_lev[i, j] = lv
+                mom_max[i, j] = mom
+            if (
+                lv >= froude_max_lev[i, j] and froude > froude_max[i, j]
+            ) or lv > froude_max_lev[i, j]:
+                froude_max_lev[i, j] = lv
+                froude_max[i, j] = froude
+
+
+if njit is not None:
+    # fastmath minus the "no NaNs" assumption: the time trackers use NaN
+    # as their not-yet-set sentinel.
+    _update_maxes = njit(
+        parallel=True,
+        fastmath={"ninf", "nsz", "arcp", "contract", "afn", "reassoc"},
+        cache=True,
+    )(_update_maxes_numba)
+else:
+    _update_maxes = _update_maxes_numpy
+
+
+_HMIN_FILL = 99999.0
+
+
+class _MaxvalState:
+    """Max/min/level/time tracker arrays for one run.
+
+    All arrays are C-contiguous and bound by slot, so hot-loop access is
+    a fixed-offset load rather than a dict or instance-dict lookup.
+    """
+
+    __slots__ = [
+        "h_max",
+        "h_min",
+        "m_max",
+        "vel_max",
+        "mom_max",
+        "eta_max",
+        "lev_max",
+        "froude_max",
+        "h_max_lev",
+        "h_min_lev",
+        "m_max_lev",
+        "vel_max_lev",
+        "mom_max_lev",
+        "eta_max_lev",
+        "froude_max_lev",
+        "arrival_time",
+        "eta_max_time",
+        "vel_max_time",
+    ]
+
+    def __init__(self, dims):
+        self.h_max = np.zeros(dims, dtype="float32")
+        self.h_min = np.full(dims, _HMIN_FILL, dtype="float32")
+        self.m_max = np.zeros(dims, dtype="float32")
+        self.vel_max = np.zeros(dims, dtype="float32")
+        self.mom_max = np.zeros(dims, dtype="float32")
+        self.eta_max = np.zeros(dims, dtype="float32")
+        self.lev_max = np.zeros(dims, dtype="float32")
+        self.froude_max = np.zeros(dims, dtype="float32")
+
+        # AMR levels are small integers, and these trackers are touched
+        # for every pixel of every frame, so keep them a single byte wide.
+        self.h_max_lev = np.zeros(dims, dtype=np.int8)
+        self.h_min_lev = np.zeros(dims, dtype=np.int8)
+        self.m_max_lev = np.zeros(dims, dtype=np.int8)
+        self.vel_max_lev = np.zeros(dims, dtype=np.int8)
+        self.mom_max_lev = np.zeros(dims, dtype=np.int8)
+        self.eta_max_lev = np.zeros(dims, dtype=np.int8)
+        self.froude_max_lev = np.zeros(dims, dtype=np.int8)
+
+        # NaN marks "not yet set"; comparisons against NaN are False, so
+        # the arrival/first-peak gates need no separate validity flag.
+        self.arrival_time = np.full(dims, np.nan, dtype="float32")
+        self.eta_max_time = np.full(dims, np.nan, dtype="float32")
+        self.vel_max_time = np.full(dims, np.nan, dtype="float32")
+
+
+def _tile_windows(src, band_rows=512):
+    """Yield read windows covering src.
+
+    Uses the file's native blocks when it is tiled; for striped files the
+    strips coalesce into full-width bands of band_rows rows, so the
+    update kernel gets real tiles instead of one call per row.
+    """
+    if src.is_tiled:
+        for _, win in src.block_windows(1):
+            yield win
+    else:
+        for row in range(0, src.height, band_rows):
+            yield rasterio.windows.Window(
+                0, row, src.width, min(band_rows, src.height - row)
+            )
+
+
+def _read_frame_times(files, nplots=None):
+    """Parse the fort.t sidecars once, returning {frameno: time}.
+
+    Frames excluded by nplots are skipped, so a missing sidecar for a
+    frame that will not be processed is not an error.
+    """
+    frame_times = {}
+    for file in files:
+        frameno = int(file[-8:-4])
+        if nplots is not None and frameno not in nplots:
+            continue
+        fortt = file[:-4].replace("fort_q", "fort.t")
+        with open(fortt, "r") as f:
+            frame_times[frameno] = float(f.readline().split()[0])
+    return frame_times
+
+
+def _process_frames(files, frame_times, nplots, rho_f, rho_s, dims):
+    """Fold the (time-ordered) frame files into a fresh state."""
+    state = _MaxvalState(dims)
+    # bind the trackers (and the kernel) to locals once, outside the hot
+    # per-tile loop.
+    update_maxes = _update_maxes
+    h_max = state.h_max
+    h_min = state.h_min
+    m_max = state.m_max
+    vel_max = state.vel_max
+    mom_max = state.mom_max
+    eta_max = state.eta_max
+    froude_max = state.froude_max
+    lev_max = state.lev_max
+    h_max_lev = state.h_max_lev
+    h_min_lev = state.h_min_lev
+    m_max_lev = state.m_max_lev
+    vel_max_lev = state.vel_max_lev
+    mom_max_lev = state.mom_max_lev
+    eta_max_lev = state.eta_max_lev
+    froude_max_lev = state.froude_max_lev
+    arrival_time = state.arrival_time
+    eta_max_time = state.eta_max_time
+    vel_max_time = state.vel_max_time
+
+    # one GDAL environment for the run keeps the driver registry and
+    # block cache warm across the per-frame opens and lets GDAL use
+    # its own threads for tile decompression.
+    with rasterio.Env(GDAL_CACHEMAX=512, GDAL_NUM_THREADS="ALL_CPUS"):
+        for file in files:
+            frameno = int(file[-8:-4])
+
+            calc = True
+            if nplots is not None:
+                if frameno not in nplots:
+                    calc = False
+            if calc:
+                time = frame_times[frameno]
+                with rasterio.open(file, "r") as src:
+                    dx = src.transform[0]
+
+                    # first pass over the blocks to get the frame-wide max
+                    # level, which the arrival-time update needs.
+                    maxlevel = 0.0
+                    for win in _tile_windows(src):
+                        maxlevel = max(maxlevel, float(src.read(9, window=win).max()))
+
+                    # second pass applies the fused update kernel one block at
+                    # a time so the working set (six bands plus the slices of
+                    # all state arrays) stays cache-sized rather than
+                    # streaming every full grid through DRAM.
+                    for win in _tile_windows(src):
+                        # one dataset read of just the bands the kernel uses.
+                        h, hu, hv, hm, eta, level = src.read(
+                            (1, 2, 3, 4, 8, 9), window=win
+                        )
+                        level = level.astype(np.int8, copy=False)
+
+                        # all state arrays share the frame shape, so one tuple
+                        # of window slices indexes them all.
+                        sl = win.toslices()
+
+                        update_maxes(
+                            h,
+                            hu,
+                            hv,
+                            hm,
+                            eta,
+                            level,
+                            dx,
+                            time,
+                            rho_f,
+                            rho_s,
+                            h_max[sl],
+                            h_min[sl],
+                            m_max[sl],
+                            vel_max[sl],
+                            mom_max[sl],
+                            eta_max[sl],
+                            froude_max[sl],
+                            lev_max[sl],
+                            h_max_lev[sl],
+                            h_min_lev[sl],
+                            m_max_lev[sl],
+                            vel_max_lev[sl],
+                            mom_max_lev[sl],
+                            eta_max_lev[sl],
+                            froude_max_lev[sl],
+                            arrival_time[sl],
+                            eta_max_time[sl],
+                            vel_max_time[sl],
+                            maxlevel,
+                        )
+    return state
+
+
 def dclaw2maxval_withlev(
     wdir=".",
     gdir="_gridded_output",
@@ -276,158 +733,49 @@ def dclaw2maxval_withlev(
     else:
         crs = None
 
-    files = np.sort(glob.glob(os.path.join(wdir, gdir, "*.tif")))
+    # frame numbers are zero padded, so a lexicographic sort is already
+    # time order; no need to round-trip through a numpy string array.
+    files = sorted(glob.glob(os.path.join(wdir, gdir, "*.tif")))
     if len(files) == 0:
         raise ValueError("no files")
 
     # Read them all in.
     with rasterio.open(files[0], "r") as src:
         dims = (src.meta["height"], src.meta["width"])
-
-    hmin_fill = 99999.0
-    h_max = np.zeros(dims, dtype="float32")
-    h_min = np.ones(dims, dtype="float32")
-    h_min[:] = hmin_fill
-    m_max = np.zeros(dims, dtype="float32")
-    vel_max = np.zeros(dims, dtype="float32")
-    mom_max = np.zeros(dims, dtype="float32")
-    eta_max = np.zeros(dims, dtype="float32")
-    lev_max = np.zeros(dims, dtype="float32")
-    froude_max = np.zeros(dims, dtype="float32")
-
-    h_max_lev = np.zeros(dims, dtype=int)
-    h_min_lev = np.zeros(dims, dtype=int)
-    m_max_lev = np.zeros(dims, dtype=int)
-    vel_max_lev = np.zeros(dims, dtype=int)
-    mom_max_lev = np.zeros(dims, dtype=int)
-    eta_max_lev = np.zeros(dims, dtype=int)
-    froude_max_lev = np.zeros(dims, dtype=int)
-
-    arrival_time = -1 * np.ones(dims, dtype="float32")
-    eta_max_time = -1 * np.ones(dims, dtype="float32")
-    vel_max_time = -1 * np.ones(dims, dtype="float32")
-
-    for file in files:
-        fortt = file[:-4].replace("fort_q", "fort.t")
-        # print(file)
-        frameno = int(file[-8:-4])
-
-        calc = True
-        if nplots is not None:
-            if frameno not in nplots:
-                calc = False
-        if calc:
-            # print(file[-8:-4], frameno)
-            with open(fortt, "r") as f:
-                lines = f.readlines()
-            time = float(lines[0].split()[0])
-            with rasterio.open(file, "r") as src:
-                profile = src.profile
-                transform = src.transform
-
-                dx = transform[0]
-
-                h = src.read(1)
-                hu = src.read(2)
-                hv = src.read(3)
-                hm = src.read(4)
-                eta = src.read(8)
-                level = src.read(9)
-
-                with np.errstate(divide="ignore", invalid="ignore"):
-                    m = hm / h
-                    m[np.isnan(m)] = 0
-                    vel = ((hu / h) ** 2 + (hv / h) ** 2) ** 0.5
-                    vel[np.isnan(vel)] = 0
-
-                    froude = vel / np.sqrt(9.81 * h)
-
-                density = (1.0 - m) * rho_f + (m * rho_s)
-                mom = (h * dx * dx) * density * vel
-
-                maxlevel = level.max()
-
-                # keep track of max level anywhere.
-                lev_max[level > lev_max] = level[level > lev_max]
-
-                # determine whether to overwrite.
-                overwrite_eta = ((level >= eta_max_lev) & (eta > eta_max)) | (
-                    level > eta_max_lev
-                )
-                overwrite_h_max = ((level >= h_max_lev) & (h > h_max)) | (
-                    level > h_max_lev
-                )
-                overwrite_h_min = ((level >= h_min_lev) & (h < h_min)) | (
-                    level > h_min_lev
-                )
-
-                overwrite_m = ((level >= m_max_lev) & (m > m_max)) | (level > m_max_lev)
-                overwrite_vel = ((level >= vel_max_lev) & (vel > vel_max)) | (
-                    level > vel_max_lev
-                )
-                overwrite_mom = ((level >= mom_max_lev) & (mom > mom_max)) | (
-                    level > mom_max_lev
-                )
-
-                overwrite_froude = (
-                    (level >= froude_max_lev) & (froude > froude_max)
-                ) | (level > froude_max_lev)
-                # update max level seen.
-                eta_max_lev[overwrite_eta] = level[overwrite_eta]
-                h_max_lev[overwrite_h_max] = level[overwrite_h_max]
-                h_min_lev[overwrite_h_min] = level[overwrite_h_min]
-                m_max_lev[overwrite_m] = level[overwrite_m]
-                vel_max_lev[overwrite_vel] = level[overwrite_vel]
-                mom_max_lev[overwrite_mom] = level[overwrite_mom]
-                froude_max_lev[overwrite_froude] = level[overwrite_froude]
-
-                # update arrival time, also set other times to this, to indicate the wave has arrived there and thus its valid to
-                # set a max.
-                # set arrival time to the first timestep that has eta>0.01 and highest level.
-                overwrite_arrival = (
-                    (eta > 0.01) & (arrival_time < 0) & (level == maxlevel)
-                )
-
-                arrival_time[overwrite_arrival] = time
-                eta_max_time[overwrite_arrival] = time
-                vel_max_time[overwrite_arrival] = time
-
-                # update max values.
-                h_max[overwrite_h_max] = h[overwrite_h_max]
-                h_min[overwrite_h_min] = h[overwrite_h_min]
-                m_max[overwrite_m] = m[overwrite_m]
-                vel_max[overwrite_vel] = vel[overwrite_vel]
-                mom_max[overwrite_mom] = mom[overwrite_mom]
-                eta_max[overwrite_eta] = eta[overwrite_eta]
-                froude_max[overwrite_froude] = froude[overwrite_froude]
-
-                # we want the first peak.
-                not_super_late = ((time - eta_max_time) < 1 * 60) & (arrival_time >= 0)
-
-                # use 10 minutes
-                # presuming time has been set.
-                # presuming the arrival time has passed.
-
-                overwrite_eta_time = overwrite_eta & not_super_late
-                overwrite_vel_time = overwrite_vel & not_super_late
-
-                eta_max_time[overwrite_eta_time] = time
-                vel_max_time[overwrite_vel_time] = time
+        profile = src.profile
+        transform = src.transform
+
+    frame_times = _read_frame_times(files, nplots)
+
+    # frames must fold in time order (the first-peak window is stateful),
+    # so the frame loop stays serial; the prange kernel already uses all
+    # cores within each tile.
+    state = _process_frames(files, frame_times, nplots, rho_f, rho_s, dims)
+
+    h_max = state.h_max
+    h_min = state.h_min
+    m_max = state.m_max
+    vel_max = state.vel_max
+    mom_max = state.mom_max
+    eta_max = state.eta_max
+    lev_max = state.lev_max
+    froude_max = state.froude_max
+    arrival_time = state.arrival_time
+    eta_max_time = state.eta_max_time
+    vel_max_time = state.vel_max_time
 
     never_inundated = h_max < 0.00001
-    h_max[never_inundated] = np.nan
-    h_min[h_min == 0] = np.nan
-    m_max[never_inundated] = np.nan
-    vel_max[never_inundated] = np.nan
-    mom_max[never_inundated] = np.nan
-    eta_max_time[never_inundated] = np.nan
-    vel_max_time[never_inundated] = np.nan
-    arrival_time[never_inundated] = np.nan
-    froude_max[never_inundated] = np.nan
-    # where less than zero, wave never reached.
-    eta_max_time[eta_max_time < 0] = np.nan
-    vel_max_time[vel_max_time < 0] = np.nan
-    arrival_time[arrival_time < 0] = np.nan
+    np.copyto(h_max, np.nan, where=never_inundated)
+    np.copyto(h_min, np.nan, where=h_min == 0)
+    np.copyto(m_max, np.nan, where=never_inundated)
+    np.copyto(vel_max, np.nan, where=never_inundated)
+    np.copyto(mom_max, np.nan, where=never_inundated)
+    np.copyto(eta_max_time, np.nan, where=never_inundated)
+    np.copyto(vel_max_time, np.nan, where=never_inundated)
+    np.copyto(arrival_time, np.nan, where=never_inundated)
+    np.copyto(froude_max, np.nan, where=never_inundated)
+    # cells the wave never reached already hold NaN: the time trackers
+    # accumulate with NaN sentinels, so no sign fix-up pass is needed.
 
     # then read in grided output into t, h, m, vel, mom, etc.
     # clip to required extent.
@@ -440,22 +788,33 @@ def dclaw2maxval_withlev(
     out_profile["dtype"] = "float32"
     out_profile["count"] = 10
     out_profile["transform"] = transform
+    # tiled so downstream windowed readers get square blocks; no
+    # compression, which costs far more on the single big write than it
+    # saves.
+    out_profile.update(tiled=True, blockxsize=512, blockysize=512)
 
     if write_froude:
         out_profile["count"] = 11
-    with rasterio.open(out_file, "w", **out_profile) as dst:
-        dst.write(h_max, 1)
-        dst.write(vel_max, 2)
-        dst.write(mom_max, 3)
-        dst.write(m_max, 4)
-        dst.write(eta_max_time, 5)
-        dst.write(vel_max_time, 6)
-        dst.write(eta_max, 7)
-        dst.write(lev_max, 8)
-        dst.write(arrival_time, 9)
-        dst.write(h_min, 10)
-        if write_froude:
-            dst.write(froude_max, 11)
+
+    bands = [
+        h_max,
+        vel_max,
+        mom_max,
+        m_max,
+        eta_max_time,
+        vel_max_time,
+        eta_max,
+        lev_max,
+        arrival_time,
+        h_min,
+    ]
+    if write_froude:
+        bands.append(froude_max)
+    # one write of the stacked cube lets GDAL fill each tile of every
+    # band in a single pass instead of re-walking the file per band.
+    with rasterio.Env(GDAL_NUM_THREADS="ALL_CPUS"):
+        with rasterio.open(out_file, "w", **out_profile) as dst:
+            dst.write(np.stack(bands))
 
     if extent_shp:
         if extent_shp_val == "height":
@@ -465,18 +824,39 @@ def dclaw2maxval_withlev(
         if extent_shp_val == "velocity":
             extent = vel_max > extent_shp_val_thresh
         transform = out_profile["transform"]
-        geoms = []
-        for i, (s, v) in enumerate(
-            features.shapes(extent.astype(np.int16), mask=extent, transform=transform)
-        ):
-            geoms.append(shape(s))
-        out_shp = unary_union(geoms).buffer(0)
+        # polygonize only the bounding box of the mask; for a sparse
+        # footprint GDAL then walks a small sub-raster instead of the full
+        # grid (and for a dense one the slices are the whole grid anyway).
+        rows = np.flatnonzero(extent.any(axis=1))
+        cols = np.flatnonzero(extent.any(axis=0))
+        if len(rows) > 0:
+            extent = extent[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+            transform = transform * rasterio.transform.Affine.translation(
+                cols[0], rows[0]
+            )
+        shapes = features.shapes(
+            extent.astype(np.uint8), mask=extent, transform=transform
+        )
+        out_shp = unary_union([shape(s) for s, _ in shapes]).buffer(0)
         assert out_shp.is_valid == True
-        with fiona.open(
-            extent_shp_val_out_file,
-            "w",
-            driver="Shapefile",
-            crs=crs,
-            schema={"properties": [], "geometry": "Polygon"},
-        ) as dst:
-            dst.writerecords([{"properties": {}, "geometry": mapping(out_shp)}])
+        try:
+            # pyogrio writes the whole layer in one C-level call; fall
+            # back to fiona where it is not installed.
+            import geopandas as gpd
+            import pyogrio
+
+            gdf = gpd.GeoDataFrame(
+                geometry=[out_shp], crs=crs.to_wkt() if crs is not None else None
+            )
+            pyogrio.write_dataframe(
+                gdf, extent_shp_val_out_file, driver="ESRI Shapefile"
+            )
+        except ImportError:
+            with fiona.open(
+                extent_shp_val_out_file,
+                "w",
+                driver="Shapefile",
+                crs=crs,
+                schema={"properties": [], "geometry": "Polygon"},
+            ) as dst:
+                dst.writerecords([{"properties": {}, "geometry": mapping(out_shp)}])
@@ -689,6 +689,11 @@ def griddata2gtif(
     out_profile["count"] = meqn
     out_profile["driver"] = "GTiff"
     out_profile["nodata"] = nodata_value_out
+    # tiled layout so windowed readers (e.g. maxval) get square blocks
+    # instead of the GDAL default one-row strips.
+    out_profile["tiled"] = True
+    out_profile["blockxsize"] = 512
+    out_profile["blockysize"] = 512
     if epsg is not None:
         out_profile["crs"] = rasterio.crs.CRS.from_epsg(epsg)
 